@@ -0,0 +1,200 @@
+from bisect import bisect_left
+
+class AppRecord:
+    """
+    A single Flatpak application as seen in one refresh snapshot.
+    """
+    __slots__ = ("app_id", "name", "installed", "instance_id", "host")
+
+    def __init__(self, app_id: str, name: str, installed: bool = True, instance_id: str = None, host: str = None):
+        self.app_id = app_id
+        self.name = name
+        self.installed = installed
+        self.instance_id = instance_id
+        self.host = host
+
+    @property
+    def running(self) -> bool:
+        return self.instance_id is not None
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, AppRecord):
+            return NotImplemented
+        return (self.app_id, self.name, self.installed, self.instance_id, self.host) == \
+               (other.app_id, other.name, other.installed, other.instance_id, other.host)
+
+    def __repr__(self) -> str:
+        return (f"AppRecord({self.app_id!r}, {self.name!r}, installed={self.installed}, "
+                f"instance_id={self.instance_id!r}, host={self.host!r})")
+
+class SnapshotDiff:
+    """
+    The difference between two snapshots, expressed as sets of keys.
+    """
+    __slots__ = ("added", "removed", "changed")
+
+    def __init__(self, added=(), removed=(), changed=()):
+        self.added = set(added)
+        self.removed = set(removed)
+        self.changed = set(changed)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self) -> str:
+        return f"SnapshotDiff(added={self.added}, removed={self.removed}, changed={self.changed})"
+
+def diff_snapshots(old: dict, new: dict) -> SnapshotDiff:
+    """
+    Compare two snapshots mapping keys to AppRecords.
+
+    :param old: The previous snapshot.
+    :param new: The current snapshot.
+    :return: A SnapshotDiff with the added, removed and changed keys.
+    """
+    old_keys = old.keys()
+    new_keys = new.keys()
+    changed = [key for key in old_keys & new_keys if old[key] != new[key]]
+    return SnapshotDiff(new_keys - old_keys, old_keys - new_keys, changed)
+
+class AppState:
+    """
+    Keyed model of installed and running Flatpak applications.
+    Records are keyed by app_id, or by (host, app_id) when several hosts are managed.
+    """
+    __slots__ = ("records",)
+
+    def __init__(self):
+        self.records = {}
+
+    def update(self, installed_apps: list, running_apps: dict) -> SnapshotDiff:
+        """
+        Replace the current snapshot with fresh command output and report what changed.
+
+        :param installed_apps: A list of tuples (app_id, name).
+        :param running_apps: A mapping from app_id to instance_id.
+        :return: The SnapshotDiff between the previous and the new snapshot.
+        """
+        records = {}
+        self._add_snapshot(records, installed_apps, running_apps)
+        return self._replace(records)
+
+    def update_hosts(self, snapshots: dict) -> SnapshotDiff:
+        """
+        Replace the current snapshot with the merged command output of several hosts.
+
+        :param snapshots: A mapping from host name to a tuple (installed_apps, running_apps).
+        :return: The SnapshotDiff between the previous and the new snapshot.
+        """
+        records = {}
+        for host, (installed_apps, running_apps) in snapshots.items():
+            self._add_snapshot(records, installed_apps, running_apps, host)
+        return self._replace(records)
+
+    @staticmethod
+    def _add_snapshot(records: dict, installed_apps: list, running_apps: dict, host: str = None) -> None:
+        for app_id, name in installed_apps:
+            key = app_id if host is None else (host, app_id)
+            records[key] = AppRecord(app_id, name, True, running_apps.get(app_id), host)
+        for app_id, instance_id in running_apps.items():
+            key = app_id if host is None else (host, app_id)
+            if key not in records:
+                records[key] = AppRecord(app_id, app_id, False, instance_id, host)
+
+    def _replace(self, records: dict) -> SnapshotDiff:
+        diff = diff_snapshots(self.records, records)
+        self.records = records
+        return diff
+
+    def get(self, key):
+        return self.records.get(key)
+
+class FilteredView:
+    """
+    A sorted list of keys from an AppState that satisfy a predicate.
+    The view is kept up to date from SnapshotDiffs and the selection is anchored to a key,
+    so it follows its app when other entries appear or disappear.
+    """
+    __slots__ = ("predicate", "keys", "selected_key")
+
+    def __init__(self, predicate):
+        self.predicate = predicate
+        self.keys = []
+        self.selected_key = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def rebuild(self, state: AppState) -> None:
+        """
+        Rebuild the view from scratch, e.g. after the predicate has changed.
+
+        :param state: The AppState to filter.
+        """
+        self.keys = sorted(key for key, record in state.records.items() if self.predicate(record))
+        self._reanchor()
+
+    def set_predicate(self, predicate, state: AppState) -> None:
+        self.predicate = predicate
+        self.rebuild(state)
+
+    def apply(self, state: AppState, diff: SnapshotDiff) -> None:
+        """
+        Incrementally update the view with the keys touched by a SnapshotDiff.
+
+        :param state: The AppState after the update.
+        :param diff: The diff that was applied to the state.
+        """
+        for key in diff.removed:
+            self._discard(key)
+        for key in diff.added | diff.changed:
+            if self.predicate(state.records[key]):
+                idx = bisect_left(self.keys, key)
+                if idx == len(self.keys) or self.keys[idx] != key:
+                    self.keys.insert(idx, key)
+            else:
+                self._discard(key)
+        self._reanchor()
+
+    def _discard(self, key) -> None:
+        idx = bisect_left(self.keys, key)
+        if idx < len(self.keys) and self.keys[idx] == key:
+            del self.keys[idx]
+
+    def _reanchor(self) -> None:
+        """
+        Keep the selected key if it is still visible, otherwise move to the entry
+        that now occupies its sorted position.
+        """
+        if not self.keys:
+            return
+        if self.selected_key is None:
+            self.selected_key = self.keys[0]
+            return
+        idx = bisect_left(self.keys, self.selected_key)
+        if idx == len(self.keys) or self.keys[idx] != self.selected_key:
+            self.selected_key = self.keys[min(idx, len(self.keys) - 1)]
+
+    @property
+    def selected_index(self) -> int:
+        if not self.keys:
+            return 0
+        return bisect_left(self.keys, self.selected_key)
+
+    @property
+    def selected(self):
+        return self.selected_key if self.keys else None
+
+    def move(self, delta: int) -> None:
+        """
+        Move the selection by delta entries, clamped to the view.
+
+        :param delta: The number of entries to move (negative moves up).
+        """
+        if not self.keys:
+            return
+        idx = max(0, min(len(self.keys) - 1, self.selected_index + delta))
+        self.selected_key = self.keys[idx]
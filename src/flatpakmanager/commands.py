@@ -1,16 +1,19 @@
+import time
+import uuid
 import subprocess
-import os
+from .transport import LOCAL
 
-def get_installed_flatpaks() -> list:
+def get_installed_flatpaks(transport=LOCAL, timeout: float = None) -> list:
     """
     Retrieve a list of installed Flatpak applications.
     
+    :param transport: The transport of the host to query.
+    :param timeout: The maximum time to wait for the host, in seconds (None waits indefinitely).
     :return: A list of tuples (app_id, name).
     """
     try:
-        result = subprocess.run(
-            ["flatpak", "list", "--app", "--columns=application,name"],
-            capture_output=True, text=True, check=True
+        result = transport.run(
+            ["flatpak", "list", "--app", "--columns=application,name"], check=True, timeout=timeout
         )
         apps = []
         for line in result.stdout.strip().splitlines():
@@ -19,19 +22,20 @@ def get_installed_flatpaks() -> list:
                 if len(parts) == 2:
                     apps.append((parts[0], parts[1]))
         return apps
-    except subprocess.CalledProcessError:
+    except (OSError, subprocess.CalledProcessError):
         return []
 
-def get_running_flatpaks() -> dict:
+def get_running_flatpaks(transport=LOCAL, timeout: float = None) -> dict:
     """
     Retrieve a dictionary of running Flatpak applications.
     
+    :param transport: The transport of the host to query.
+    :param timeout: The maximum time to wait for the host, in seconds (None waits indefinitely).
     :return: A mapping from app_id to instance_id.
     """
     try:
-        result = subprocess.run(
-            ["flatpak", "ps", "--columns=instance,application"],
-            capture_output=True, text=True, check=True
+        result = transport.run(
+            ["flatpak", "ps", "--columns=instance,application"], check=True, timeout=timeout
         )
         running_apps = {}
         for line in result.stdout.strip().splitlines():
@@ -40,64 +44,84 @@ def get_running_flatpaks() -> dict:
                 if len(parts) == 2:
                     running_apps[parts[1]] = parts[0]
         return running_apps
-    except subprocess.CalledProcessError:
+    except (OSError, subprocess.CalledProcessError):
         return {}
 
-def run_flatpak(app_id: str) -> None:
+def run_flatpak(app_id: str, transport=LOCAL) -> subprocess.Popen:
     """
-    Launch a Flatpak application in its own process group so that it does not receive signals 
-    from the parent process.
+    Launch a Flatpak application in its own session so that it does not receive signals 
+    from the parent process. Avoiding preexec_fn keeps subprocess on its fast spawn path.
     
     :param app_id: The Flatpak application ID.
+    :param transport: The transport of the host to launch on.
+    :return: The launched 'flatpak run' process.
     """
-    subprocess.Popen(
-        ["flatpak", "run", app_id],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        preexec_fn=os.setpgrp
-    )
+    return transport.popen(["flatpak", "run", app_id])
 
-def stop_flatpak(instance_id: str) -> None:
+def launch_flatpak_in_session(app_id: str, transport=LOCAL, settle: float = 2.0, timeout: float = 10) -> bool:
     """
-    Stop a running Flatpak application.
+    Launch a Flatpak application as a transient unit of the user's systemd session.
+    A command run over SSH has no DISPLAY, WAYLAND_DISPLAY or session bus, but units of the
+    user manager inherit the environment the graphical session imported into it.
     
-    :param instance_id: The instance ID of the running application.
+    :param app_id: The Flatpak application ID.
+    :param transport: The transport of the host to launch on.
+    :param settle: The time to wait before checking that the app did not fail, in seconds.
+    :param timeout: The maximum time each command may take, in seconds.
+    :return: True if the app is still running after settle seconds or exited successfully.
     """
-    subprocess.run(
-        ["flatpak", "kill", instance_id],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
-    )
+    unit = f"flatpak-manager-{app_id}-{uuid.uuid4().hex[:8]}"
+    try:
+        started = transport.run(
+            ["systemd-run", "--user", "--quiet", f"--unit={unit}", "flatpak", "run", app_id], timeout=timeout
+        )
+        if started.returncode != 0:
+            return False
+        time.sleep(settle)
+        shown = transport.run(
+            ["systemctl", "--user", "show", "--property=ActiveState,Result", unit], timeout=timeout
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    properties = dict(line.partition("=")[::2] for line in shown.stdout.splitlines())
+    if properties.get("ActiveState") == "failed" or properties.get("Result", "success") != "success":
+        # Failed units are kept by systemd until reset; a failed cleanup does not change the outcome.
+        try:
+            transport.run(["systemctl", "--user", "reset-failed", unit], timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        return False
+    return True
 
-def get_flatpak_description(app_id: str) -> str:
+def stop_flatpak(instance_id: str, timeout: float = None, transport=LOCAL) -> bool:
     """
-    Retrieve the description of a Flatpak application.
+    Stop a running Flatpak application.
     
-    :param app_id: The application ID.
-    :return: A string description, or a default message if unavailable.
+    :param instance_id: The instance ID of the running application.
+    :param timeout: The maximum time to wait for 'flatpak kill', in seconds (None waits indefinitely).
+    :param transport: The transport of the host running the application.
+    :return: True if 'flatpak kill' succeeded.
     """
     try:
-        result = subprocess.run(
-            ["flatpak", "info", "--show-description", app_id],
-            capture_output=True, text=True, check=True
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError:
-        return "No description available."
+        result = transport.run(["flatpak", "kill", instance_id], timeout=timeout)
+        return result.returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
 
-def search_flatpak_packages(term: str) -> list:
+def search_flatpak_packages(term: str, transport=LOCAL, timeout: float = None) -> list:
     """
     Search for Flatpak packages matching the provided term.
     
     :param term: The search term.
+    :param transport: The transport of the host to search from.
+    :param timeout: The maximum time to wait for the host, in seconds (None waits indefinitely).
     :return: A list of tuples (app_id, name, description), limited to the first 150 entries.
     """
     if not term:
         return []
     try:
-        result = subprocess.run(
-            ["flatpak", "search", "--columns=application,name,description", term],
-            capture_output=True, text=True, check=True
+        result = transport.run(
+            ["flatpak", "search", "--columns=application,name,description", term], check=True, timeout=timeout
         )
         lines = result.stdout.strip().splitlines()
         # Skip a header line if present.
@@ -115,3 +139,31 @@ def search_flatpak_packages(term: str) -> list:
         return packages[:150]
     except subprocess.CalledProcessError:
         return []
+
+def install_flatpak(app_id: str, transport=LOCAL) -> bool:
+    """
+    Install a package from Flathub without prompting.
+    
+    :param app_id: The package ID.
+    :param transport: The transport of the host to install on.
+    :return: True if the installation succeeded.
+    """
+    try:
+        result = transport.run(["flatpak", "install", "-y", "--noninteractive", "flathub", app_id])
+        return result.returncode == 0
+    except OSError:
+        return False
+
+def uninstall_flatpak(app_id: str, transport=LOCAL) -> bool:
+    """
+    Uninstall a package without prompting.
+    
+    :param app_id: The package ID.
+    :param transport: The transport of the host to uninstall from.
+    :return: True if the removal succeeded.
+    """
+    try:
+        result = transport.run(["flatpak", "uninstall", "-y", "--noninteractive", app_id])
+        return result.returncode == 0
+    except OSError:
+        return False
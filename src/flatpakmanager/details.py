@@ -0,0 +1,304 @@
+import time
+import subprocess
+import threading
+import configparser
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .transport import LOCAL
+
+class PackageDetails:
+    """
+    Metadata of a single package, as reported by 'flatpak info' or 'flatpak remote-info'.
+    """
+    __slots__ = ("app_id", "description", "version", "download_size", "installed_size",
+                 "runtime", "origin", "permissions", "error")
+
+    def __init__(self, app_id: str, description: str = "", version: str = "", download_size: str = "",
+                 installed_size: str = "", runtime: str = "", origin: str = "", permissions=(), error: str = ""):
+        self.app_id = app_id
+        self.description = description
+        self.version = version
+        self.download_size = download_size
+        self.installed_size = installed_size
+        self.runtime = runtime
+        self.origin = origin
+        self.permissions = list(permissions)
+        self.error = error
+
+    @property
+    def size(self) -> int:
+        """
+        Approximate memory footprint in bytes, used for cache eviction.
+        """
+        fields = (self.app_id, self.description, self.version, self.download_size,
+                  self.installed_size, self.runtime, self.origin, self.error)
+        return 64 + sum(len(field) for field in fields) + sum(len(line) for line in self.permissions)
+
+    def lines(self) -> list:
+        """
+        Format the details for display, one field per line. Empty fields are left out.
+        """
+        if self.error:
+            return [f"Details unavailable: {self.error}"]
+        fields = [
+            ("Version", self.version),
+            ("Download size", self.download_size),
+            ("Installed size", self.installed_size),
+            ("Runtime", self.runtime),
+            ("Origin", self.origin),
+        ]
+        lines = [f"{label}: {value}" for label, value in fields if value]
+        if self.permissions:
+            lines.append("Permissions:")
+            lines.extend(f"  {permission}" for permission in self.permissions)
+        return lines
+
+def parse_info_output(text: str) -> tuple:
+    """
+    Parse the output of 'flatpak info' or 'flatpak remote-info'.
+    The first line reads 'Name - summary', followed by right-aligned 'Key: value' lines.
+
+    :param text: The command output.
+    :return: A tuple (summary, fields) with fields mapping each key to its value.
+    """
+    summary = ""
+    fields = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        key, sep, value = line.partition(": ")
+        if sep and " " not in key.strip():
+            fields[key.strip()] = value.strip()
+        elif not fields and not summary:
+            summary = line.partition(" - ")[2] or line
+    return summary, fields
+
+def parse_permissions(text: str) -> list:
+    """
+    Parse sandbox permissions from app metadata ('--show-permissions' or '--show-metadata').
+
+    :param text: The keyfile text.
+    :return: A list of readable permission lines.
+    """
+    parser = configparser.RawConfigParser(delimiters=("=",), interpolation=None)
+    parser.optionxform = str
+    try:
+        parser.read_string(text)
+    except configparser.Error:
+        return []
+    permissions = []
+    if parser.has_section("Context"):
+        for key, value in parser.items("Context"):
+            entries = [entry for entry in value.split(";") if entry]
+            if entries:
+                permissions.append(f"{key}: {', '.join(entries)}")
+    for section, label in (("Session Bus Policy", "session bus"), ("System Bus Policy", "system bus")):
+        if parser.has_section(section):
+            for name, policy in parser.items(section):
+                permissions.append(f"{label}: {name} ({policy})")
+    return permissions
+
+def _run_output(argv: list, transport) -> str:
+    try:
+        return transport.run(argv, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def fetch_installed_details(app_id: str, transport=LOCAL) -> PackageDetails:
+    """
+    Fetch the details of an installed application.
+
+    :param app_id: The application ID.
+    :param transport: The transport of the host the application is installed on.
+    :return: The PackageDetails, with error set if the application could not be queried.
+    """
+    info = _run_output(["flatpak", "info", app_id], transport)
+    if not info:
+        return PackageDetails(app_id, error="'flatpak info' failed")
+    summary, fields = parse_info_output(info)
+    permissions = parse_permissions(_run_output(["flatpak", "info", "--show-permissions", app_id], transport))
+    return PackageDetails(
+        app_id, summary, fields.get("Version", ""), "", fields.get("Installed", ""),
+        fields.get("Runtime", ""), fields.get("Origin", ""), permissions
+    )
+
+def fetch_remote_details(app_id: str, remote: str = "flathub", transport=LOCAL) -> PackageDetails:
+    """
+    Fetch the details of a package available from a remote.
+
+    :param app_id: The package ID.
+    :param remote: The name of the remote.
+    :param transport: The transport of the host to query from.
+    :return: The PackageDetails, with error set if the package could not be queried.
+    """
+    info = _run_output(["flatpak", "remote-info", remote, app_id], transport)
+    if not info:
+        return PackageDetails(app_id, error="'flatpak remote-info' failed")
+    summary, fields = parse_info_output(info)
+    metadata = _run_output(["flatpak", "remote-info", "--show-metadata", remote, app_id], transport)
+    return PackageDetails(
+        app_id, summary, fields.get("Version", ""), fields.get("Download", ""), fields.get("Installed", ""),
+        fields.get("Runtime", ""), remote, parse_permissions(metadata)
+    )
+
+class DetailCache:
+    """
+    LRU cache of PackageDetails that evicts the least recently used entries
+    once the total size of the cached details exceeds max_bytes.
+    The cache has its own lock, so it can be shared by several DetailFetchers.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            details = self._entries.get(key)
+            if details is not None:
+                self._entries.move_to_end(key)
+            return details
+
+    def put(self, key, details: PackageDetails) -> None:
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = details
+            self.total_bytes += details.size
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+
+    def discard(self, key) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def _discard(self, key) -> None:
+        details = self._entries.pop(key, None)
+        if details is not None:
+            self.total_bytes -= details.size
+
+class DetailFetcher:
+    """
+    Fetch PackageDetails lazily in background threads so the UI never waits on a subprocess.
+    At most max_in_flight fetches run at once. Requests waiting for a free slot are served
+    most recent first, and only the newest max_queued are kept, so requests for entries the
+    user has already scrolled past are dropped.
+    Failed fetches are not cached; they are kept for error_ttl seconds and then retried.
+    """
+
+    def __init__(self, fetch, max_in_flight: int = 3, max_queued: int = 8, cache: DetailCache = None,
+                 error_ttl: float = 10.0):
+        self.fetch = fetch
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.cache = cache if cache is not None else DetailCache()
+        self.error_ttl = error_ttl
+        # Guards the request queue and the errors; the cache locks itself.
+        self._lock = threading.Lock()
+        self._errors = {}
+        self._queued = OrderedDict()
+        self._in_flight = set()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="flatpak-details")
+
+    def get(self, key):
+        """
+        Return the cached details for key, or request them and return None.
+
+        :param key: The key of the entry.
+        :return: The PackageDetails, or None if they are not fetched yet.
+        """
+        details = self.cache.get(key)
+        if details is None:
+            with self._lock:
+                details = self._recent_error(key)
+                if details is None:
+                    self._request(key)
+                    self._pump()
+        return details
+
+    def prefetch(self, keys) -> None:
+        """
+        Request details for entries that are likely to be selected next.
+        Keys are given in order of increasing priority.
+
+        :param keys: The keys to prefetch.
+        """
+        with self._lock:
+            for key in keys:
+                if key not in self.cache and self._recent_error(key) is None:
+                    self._request(key)
+            self._pump()
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            self._errors.pop(key, None)
+        self.cache.discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._errors.clear()
+        self.cache.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._queued.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _recent_error(self, key):
+        entry = self._errors.get(key)
+        if entry is None:
+            return None
+        details, expires = entry
+        if time.monotonic() >= expires:
+            del self._errors[key]
+            return None
+        return details
+
+    def _request(self, key) -> None:
+        if key in self._in_flight:
+            return
+        self._queued[key] = None
+        self._queued.move_to_end(key)
+        while len(self._queued) > self.max_queued:
+            self._queued.popitem(last=False)
+
+    def _pump(self) -> None:
+        if self._closed:
+            return
+        while self._queued and len(self._in_flight) < self.max_in_flight:
+            key, _ = self._queued.popitem(last=True)
+            self._in_flight.add(key)
+            self._executor.submit(self._run, key)
+
+    def _run(self, key) -> None:
+        try:
+            details = self.fetch(key)
+        except Exception as e:
+            details = PackageDetails(str(key), error=str(e) or e.__class__.__name__)
+        if not details.error:
+            self.cache.put(key, details)
+        with self._lock:
+            if details.error:
+                self._errors[key] = (details, time.monotonic() + self.error_ttl)
+            else:
+                self._errors.pop(key, None)
+            self._in_flight.discard(key)
+            self._pump()
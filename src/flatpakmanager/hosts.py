@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from .commands import get_installed_flatpaks, get_running_flatpaks
+
+# The maximum time a single query command may take on one host, in seconds.
+QUERY_TIMEOUT = 10
+
+class HostPool:
+    """
+    A set of hosts managed together. Commands are sent to the hosts in parallel,
+    each over the host's own (multiplexed) transport.
+    Queries run in the background, one per host, and self.snapshots keeps the last good
+    result of every host, so a slow or unreachable host never holds up the others.
+    """
+
+    def __init__(self, transports: list, max_workers: int = 8, query_timeout: float = QUERY_TIMEOUT):
+        self.transports = {transport.name: transport for transport in transports}
+        self.selected = set(self.transports)
+        self.errors = {}
+        self.snapshots = {}
+        self.query_timeout = query_timeout
+        self._queries = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="flatpak-host")
+        # Queries get their own workers so a hanging host cannot delay operations.
+        self._query_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="flatpak-query")
+
+    def __iter__(self):
+        return iter(sorted(self.transports))
+
+    def fan_out(self, fn, hosts=None) -> dict:
+        """
+        Call fn(transport) for each host in parallel.
+        Hosts whose call raised are left out of the result and recorded in self.errors.
+
+        :param fn: The function to call with each host's transport.
+        :param hosts: The host names to target (default: the selected hosts).
+        :return: A mapping from host name to the result of fn.
+        """
+        hosts = sorted(self.selected if hosts is None else hosts)
+        futures = {host: self._executor.submit(fn, self.transports[host]) for host in hosts}
+        results = {}
+        for host, future in futures.items():
+            try:
+                results[host] = future.result()
+                self.errors.pop(host, None)
+            except Exception as e:
+                self.errors[host] = str(e) or e.__class__.__name__
+        return results
+
+    def _query_host(self, transport) -> tuple:
+        return (get_installed_flatpaks(transport, self.query_timeout),
+                get_running_flatpaks(transport, self.query_timeout))
+
+    def refresh(self) -> None:
+        """
+        Start a background query of installed and running apps on every host
+        that does not have a query in flight already.
+        """
+        for host, transport in self.transports.items():
+            if host not in self._queries:
+                self._queries[host] = self._query_executor.submit(self._query_host, transport)
+
+    def collect(self) -> bool:
+        """
+        Store the results of finished queries in self.snapshots. A host whose query failed
+        keeps its last good snapshot and is recorded in self.errors.
+
+        :return: True if any query finished since the last call.
+        """
+        finished = False
+        for host, future in list(self._queries.items()):
+            if not future.done():
+                continue
+            del self._queries[host]
+            finished = True
+            try:
+                self.snapshots[host] = future.result()
+                self.errors.pop(host, None)
+            except Exception as e:
+                self.errors[host] = str(e) or e.__class__.__name__
+        return finished
+
+    def query(self) -> dict:
+        """
+        Query installed and running apps on all hosts in parallel and wait for the results.
+        Each host takes at most two query timeouts.
+
+        :return: A mapping from host name to a tuple (installed_apps, running_apps).
+        """
+        self.refresh()
+        wait(list(self._queries.values()))
+        self.collect()
+        return dict(self.snapshots)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self._query_executor.shutdown(wait=False, cancel_futures=True)
+        for transport in self.transports.values():
+            transport.close()
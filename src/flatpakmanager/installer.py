@@ -1,8 +1,15 @@
 import curses
 import time
+import subprocess
 import pexpect
-from .utils import strip_ansi_codes, confirm_action
-from .commands import search_flatpak_packages
+from .utils import strip_ansi_codes, confirm_action, show_host_report
+from .commands import search_flatpak_packages, install_flatpak
+from .transport import LOCAL, HostUnreachableError
+from .hosts import QUERY_TIMEOUT
+from .details import DetailCache, DetailFetcher, fetch_remote_details
+
+# Remote package details outlive a single visit to installation mode.
+_remote_details_cache = DetailCache()
 
 def run_install_command(stdscr, app_id: str, package_name: str) -> None:
     """
@@ -80,12 +87,44 @@ def run_install_command(stdscr, app_id: str, package_name: str) -> None:
     while stdscr.getch() != ord('q'):
         pass
 
-def install_package_mode(stdscr) -> None:
+def search_transport_for(pool=None):
+    """
+    Choose the host to search from. The remote's catalogue is the same everywhere, so any
+    reachable host will do: selected hosts are preferred and hosts with errors are skipped.
+
+    :param pool: A HostPool, or None for the local machine.
+    :return: The transport to search from.
+    """
+    if pool is None or not pool.transports:
+        return LOCAL
+    candidates = sorted(pool.selected) or sorted(pool.transports)
+    reachable = [host for host in candidates if host not in pool.errors]
+    return pool.transports[(reachable or candidates)[0]]
+
+def search_packages(term: str, transport=LOCAL, timeout: float = QUERY_TIMEOUT) -> tuple:
+    """
+    Search for packages without letting an unreachable or unresponsive host escape to the UI.
+
+    :param term: The search term.
+    :param transport: The transport of the host to search from.
+    :param timeout: The maximum time to wait for the host, in seconds.
+    :return: A tuple (packages, message) where message explains a failed search.
+    """
+    try:
+        return search_flatpak_packages(term, transport, timeout), ""
+    except HostUnreachableError as e:
+        return [], f"Search failed: {e.host} is unreachable."
+    except subprocess.TimeoutExpired:
+        return [], f"Search failed: {transport.name} did not answer within {timeout} s."
+
+def install_package_mode(stdscr, pool=None) -> None:
     """
     Enter the interactive installation mode.
     Users can search for packages, view package details, and confirm installation.
+    In multi-host mode the package is installed on all selected hosts in parallel.
     
     :param stdscr: The curses window.
+    :param pool: A HostPool to install on, or None for the local machine.
     """
     curses.curs_set(1)
     search_term = ""
@@ -96,6 +135,11 @@ def install_package_mode(stdscr) -> None:
     last_results = []
     debounce_delay = 0.5  # Delay (in seconds) for debouncing keystrokes.
     last_input_time = time.time()
+    status_message = ""
+    search_transport = search_transport_for(pool)
+    details = DetailFetcher(
+        lambda key: fetch_remote_details(key[1], "flathub", search_transport), cache=_remote_details_cache
+    )
     
     stdscr.nodelay(True)
     
@@ -103,6 +147,8 @@ def install_package_mode(stdscr) -> None:
         stdscr.clear()
         header = "Install Package - Enter name (ESC to cancel): " + search_term
         stdscr.addstr(0, 0, header)
+        if status_message:
+            stdscr.addstr(1, 0, status_message[:stdscr.getmaxyx()[1] - 1])
         
         list_start_line = 2
         max_y, max_x = stdscr.getmaxyx()
@@ -111,7 +157,7 @@ def install_package_mode(stdscr) -> None:
         # Update search results after a debounce delay.
         current_time = time.time()
         if search_term and (current_time - last_input_time >= debounce_delay) and (search_term != last_search_term):
-            last_results = search_flatpak_packages(search_term)
+            last_results, status_message = search_packages(search_term, search_transport)
             last_results = sorted(
                 last_results,
                 key=lambda pkg: (
@@ -149,13 +195,24 @@ def install_package_mode(stdscr) -> None:
         # Show package details in the right panel.
         detail_col = max_x // 2
         if results and selected_index < len(results):
-            sel_app_id, sel_name, _ = results[selected_index]
-            details = [
+            sel_app_id, sel_name, sel_description = results[selected_index]
+            # Prefetch the neighbours first so the selected entry is fetched with the highest priority.
+            neighbours = [results[i][0] for i in (selected_index + 2, selected_index - 1, selected_index + 1)
+                          if 0 <= i < len(results)]
+            details.prefetch((search_transport.name, app_id) for app_id in neighbours)
+            package_details = details.get((search_transport.name, sel_app_id))
+            detail_lines = [
                 "Package Details:",
                 f"Name: {sel_name}",
                 f"Package Code: {sel_app_id}"
             ]
-            for j, line in enumerate(details):
+            if sel_description:
+                detail_lines.append(f"Description: {sel_description}")
+            if package_details is None:
+                detail_lines.append("Loading details...")
+            else:
+                detail_lines.extend(package_details.lines())
+            for j, line in enumerate(detail_lines):
                 truncated_line = line[:max_x - detail_col - 1]
                 if list_start_line + j < max_y:
                     stdscr.addstr(list_start_line + j, detail_col, truncated_line)
@@ -166,14 +223,28 @@ def install_package_mode(stdscr) -> None:
         if key == -1:
             time.sleep(0.05)
             continue
+        status_message = ""
         
         if key in (10, 13):  # Enter key
             if results:
                 selected_app = results[selected_index]
-                confirm_msg = f"Install package {selected_app[1]} ({selected_app[0]})?"
-                if confirm_action(stdscr, confirm_msg):
-                    run_install_command(stdscr, selected_app[0], selected_app[1])
-                    break
+                if pool is not None and not pool.selected:
+                    status_message = "No hosts selected. Press ESC and use F2 to select hosts."
+                elif pool is not None:
+                    confirm_msg = f"Install package {selected_app[1]} ({selected_app[0]}) on {len(pool.selected)} host(s)?"
+                    if confirm_action(stdscr, confirm_msg):
+                        stdscr.clear()
+                        stdscr.addstr(0, 0, f"Installing {selected_app[1]} ({selected_app[0]}) on {', '.join(sorted(pool.selected))}...")
+                        stdscr.refresh()
+                        host_results = pool.fan_out(lambda transport: install_flatpak(selected_app[0], transport))
+                        errors = {host: message for host, message in pool.errors.items() if host in pool.selected}
+                        show_host_report(stdscr, f"Installation of {selected_app[1]} ({selected_app[0]}):", host_results, errors)
+                        break
+                else:
+                    confirm_msg = f"Install package {selected_app[1]} ({selected_app[0]})?"
+                    if confirm_action(stdscr, confirm_msg):
+                        run_install_command(stdscr, selected_app[0], selected_app[1])
+                        break
         elif key == 27:  # ESC key cancels installation mode.
             break
         elif key == curses.KEY_UP:
@@ -195,5 +266,6 @@ def install_package_mode(stdscr) -> None:
             scroll_offset = 0
             last_input_time = time.time()
     
+    details.close()
     stdscr.nodelay(False)
     curses.curs_set(0)
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import signal
+import configparser
+
+# Flatpak creates one directory per running sandbox below this path.
+INSTANCE_DIR = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}"), ".flatpak"
+)
+
+def read_instance_app_id(instance_id: str) -> str:
+    """
+    Read the application ID of a sandbox from its instance info file.
+
+    :param instance_id: The instance ID (the directory name below INSTANCE_DIR).
+    :return: The application ID, or None if the instance is not (yet) readable.
+    """
+    parser = configparser.RawConfigParser()
+    try:
+        if not parser.read(os.path.join(INSTANCE_DIR, instance_id, "info")):
+            return None
+    except configparser.Error:
+        return None
+    return parser.get("Application", "name", fallback=None)
+
+def scan_instances() -> dict:
+    """
+    List the sandbox instances present in the Flatpak runtime directory without spawning a process.
+
+    :return: A mapping from instance_id to app_id.
+    """
+    instances = {}
+    try:
+        entries = os.scandir(INSTANCE_DIR)
+    except OSError:
+        return instances
+    with entries:
+        for entry in entries:
+            if entry.is_dir():
+                app_id = read_instance_app_id(entry.name)
+                if app_id:
+                    instances[entry.name] = app_id
+    return instances
+
+def read_instance_pid(instance_id: str) -> int:
+    """
+    Read the PID of the bwrap process that owns a sandbox instance.
+
+    :param instance_id: The instance ID.
+    :return: The PID, or None if unavailable.
+    """
+    try:
+        with open(os.path.join(INSTANCE_DIR, instance_id, "pid")) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def read_namespace_init_pid(instance_id: str) -> int:
+    """
+    Read the PID (as seen from the host) of the init process of a sandbox's PID namespace.
+    Killing this process tears down every process in the namespace.
+
+    :param instance_id: The instance ID.
+    :return: The PID, or None if unavailable.
+    """
+    try:
+        with open(os.path.join(INSTANCE_DIR, instance_id, "bwrapinfo.json")) as f:
+            return int(json.load(f)["child-pid"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def _process_start_time(pid: int) -> int:
+    """
+    Return the start time of a live process in clock ticks after boot, or None if it is gone.
+    A killed process that has not been reaped yet counts as gone.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return None if fields[0] == "Z" else int(fields[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+def read_instance_processes(instance_id: str) -> dict:
+    """
+    Record the live namespace init and bwrap processes of a sandbox together with their start times.
+    Flatpak leaves the instance directory behind until its lazy cleanup runs, and PIDs are reused,
+    so later checks compare against this record instead of trusting the files again.
+
+    :param instance_id: The instance ID.
+    :return: A mapping from PID to start time, with the namespace init first.
+    """
+    processes = {}
+    for pid in (read_namespace_init_pid(instance_id), read_instance_pid(instance_id)):
+        if pid is not None and pid not in processes:
+            start_time = _process_start_time(pid)
+            if start_time is not None:
+                processes[pid] = start_time
+    return processes
+
+def instance_alive(instance_id: str, processes: dict = None) -> bool:
+    """
+    Check whether a sandbox instance still has a live bwrap or namespace init process.
+
+    :param instance_id: The instance ID.
+    :param processes: The processes recorded by read_instance_processes (default: read them now).
+    :return: True if the instance is still running.
+    """
+    if processes is None:
+        processes = read_instance_processes(instance_id)
+    return any(_process_start_time(pid) == start_time for pid, start_time in processes.items())
+
+def wait_for_instance_exit(instance_id: str, timeout: float, interval: float = 0.05, processes: dict = None) -> bool:
+    """
+    Wait until a sandbox instance has exited.
+
+    :param instance_id: The instance ID.
+    :param timeout: The maximum time to wait, in seconds.
+    :param interval: The polling interval, in seconds.
+    :param processes: The processes recorded by read_instance_processes (default: read them on every check).
+    :return: True if the instance exited within the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while instance_alive(instance_id, processes):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+    return True
+
+def _kill_process(pid: int, start_time: int) -> bool:
+    pidfd_open = getattr(os, "pidfd_open", None)
+    try:
+        pidfd = pidfd_open(pid) if pidfd_open else None
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pidfd = None
+    try:
+        # A pidfd keeps referring to the process it was opened for, so checking the start time
+        # after opening it cannot be raced by the PID being reused.
+        if _process_start_time(pid) != start_time:
+            return False
+        if pidfd is None:
+            os.kill(pid, signal.SIGKILL)
+        else:
+            signal.pidfd_send_signal(pidfd, signal.SIGKILL)
+        return True
+    except OSError:
+        return False
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+def kill_instance_namespace(instance_id: str, processes: dict = None) -> bool:
+    """
+    Send SIGKILL to the init process of a sandbox's PID namespace, or to its bwrap process
+    if the namespace init is gone. A process whose start time no longer matches the record
+    has reused the PID and is left alone.
+
+    :param instance_id: The instance ID.
+    :param processes: The processes recorded by read_instance_processes (default: read them now).
+    :return: True if a signal was delivered.
+    """
+    if processes is None:
+        processes = read_instance_processes(instance_id)
+    return any(_kill_process(pid, start_time) for pid, start_time in processes.items())
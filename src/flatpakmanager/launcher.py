@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import threading
+import subprocess
+from .commands import run_flatpak
+from .instances import scan_instances
+
+# Launch counts used to decide which apps are worth pre-warming.
+LAUNCH_COUNTS_FILE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "flatpakmanager", "launches.json"
+)
+# Older launches count less, so apps that are no longer used drop out of the pre-warm set.
+LAUNCH_COUNT_DECAY = 0.9
+# Serializes the background writers of LAUNCH_COUNTS_FILE.
+_launch_counts_lock = threading.Lock()
+
+class PendingLaunch:
+    """
+    A launched 'flatpak run' child whose sandbox has not appeared yet.
+    """
+    __slots__ = ("app_id", "process", "started", "known_instances")
+
+    def __init__(self, app_id: str, process: subprocess.Popen, started: float, known_instances: set):
+        self.app_id = app_id
+        self.process = process
+        self.started = started
+        self.known_instances = known_instances
+
+class LaunchTracker:
+    """
+    Launch Flatpak apps and measure the time until their sandbox instance appears.
+    """
+
+    def __init__(self, launch_timeout: float = 60.0):
+        self.launch_timeout = launch_timeout
+        self.pending = {}
+        self.latencies = {}
+        self.failed = set()
+
+    def launch(self, app_id: str) -> None:
+        """
+        Launch an app and start watching for its instance.
+
+        :param app_id: The Flatpak application ID.
+        """
+        known = {instance for instance, app in scan_instances().items() if app == app_id}
+        started = time.monotonic()
+        process = run_flatpak(app_id)
+        self.pending[app_id] = PendingLaunch(app_id, process, started, known)
+        self.failed.discard(app_id)
+        # Rewriting the counts file is kept off the input path.
+        threading.Thread(target=record_launch, args=(app_id,), name="flatpak-launch-count", daemon=True).start()
+
+    def poll(self) -> list:
+        """
+        Check pending launches against the instance directory.
+
+        :return: The app IDs whose launch finished (running, failed or timed out) since the last poll.
+        """
+        if not self.pending:
+            return []
+        now = time.monotonic()
+        instances = scan_instances()
+        finished = []
+        for app_id, launch in list(self.pending.items()):
+            new_instances = {i for i, app in instances.items() if app == app_id} - launch.known_instances
+            if new_instances:
+                self.latencies[app_id] = now - launch.started
+            elif launch.process.poll() is not None:
+                # A zero exit without a new instance means an existing instance took over the request.
+                if launch.process.returncode != 0:
+                    self.failed.add(app_id)
+            elif now - launch.started > self.launch_timeout:
+                self.failed.add(app_id)
+            else:
+                continue
+            del self.pending[app_id]
+            finished.append(app_id)
+        return finished
+
+def load_launch_counts() -> dict:
+    """
+    Load the persisted launch counts.
+
+    :return: A mapping from app_id to the number of launches.
+    """
+    try:
+        with open(LAUNCH_COUNTS_FILE) as f:
+            counts = json.load(f)
+        return counts if isinstance(counts, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def record_launch(app_id: str) -> None:
+    """
+    Increment the persisted launch count of an app. All other counts decay by
+    LAUNCH_COUNT_DECAY and are forgotten once they become insignificant.
+
+    :param app_id: The Flatpak application ID.
+    """
+    with _launch_counts_lock:
+        counts = {app: count * LAUNCH_COUNT_DECAY for app, count in load_launch_counts().items()
+                  if isinstance(count, (int, float)) and count * LAUNCH_COUNT_DECAY >= 0.1}
+        counts[app_id] = counts.get(app_id, 0) + 1
+        try:
+            os.makedirs(os.path.dirname(LAUNCH_COUNTS_FILE), exist_ok=True)
+            with open(LAUNCH_COUNTS_FILE, "w") as f:
+                json.dump(counts, f)
+        except OSError:
+            pass
+
+def _flatpak_location(ref: str) -> str:
+    try:
+        result = subprocess.run(
+            ["flatpak", "info", "--show-location", ref],
+            capture_output=True, text=True, check=True
+        )
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def _flatpak_runtime(app_id: str) -> str:
+    try:
+        result = subprocess.run(
+            ["flatpak", "info", "--show-runtime", app_id],
+            capture_output=True, text=True, check=True
+        )
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def prewarm_app(app_id: str, max_bytes: int = 64 * 1024 * 1024) -> int:
+    """
+    Ask the kernel to read an app's deployment and its runtime into the page cache.
+    Uses posix_fadvise(WILLNEED), so the reads happen asynchronously in the kernel.
+    The budget is kept small because the hinted pages can push other data out of the cache.
+
+    :param app_id: The Flatpak application ID.
+    :param max_bytes: Stop after hinting this many bytes.
+    :return: The number of bytes hinted.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return 0
+    locations = [_flatpak_location(app_id)]
+    runtime = _flatpak_runtime(app_id)
+    if runtime:
+        locations.append(_flatpak_location(f"runtime/{runtime}"))
+    hinted = 0
+    for location in filter(None, locations):
+        for root, _, files in os.walk(os.path.join(location, "files")):
+            for filename in files:
+                path = os.path.join(root, filename)
+                try:
+                    fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+                except OSError:
+                    continue
+                try:
+                    size = os.fstat(fd).st_size
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                    hinted += size
+                except OSError:
+                    pass
+                finally:
+                    os.close(fd)
+                if hinted >= max_bytes:
+                    return hinted
+    return hinted
+
+def prewarm_frequent_apps(count: int = 3) -> threading.Thread:
+    """
+    Pre-warm the most frequently launched apps in a background thread.
+    With the default budget this hints at most count * 64 MiB.
+
+    :param count: The number of apps to pre-warm.
+    :return: The started daemon thread.
+    """
+    counts = load_launch_counts()
+    frequent = sorted(counts, key=counts.get, reverse=True)[:count]
+
+    def worker():
+        for app_id in frequent:
+            prewarm_app(app_id)
+
+    thread = threading.Thread(target=worker, name="flatpak-prewarm", daemon=True)
+    thread.start()
+    return thread
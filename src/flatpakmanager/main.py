@@ -3,6 +3,8 @@ import sys
 import argparse
 import curses
 from .ui import main_loop
+from .hosts import HostPool
+from .transport import transport_for
 
 man_page_text = """
 FLATPAK MANAGER(1)                             User Commands                            FLATPAK MANAGER(1)
@@ -11,19 +13,35 @@ NAME
        flatpak-manager - curses based Flatpak management tool
 
 SYNOPSIS
-       flatpak-manager [--manpage]
+       flatpak-manager [--manpage] [--prewarm] [--host HOST]...
 
 DESCRIPTION
        flatpak-manager is an interactive terminal application for managing Flatpak applications.
        It provides an interface to list, run, stop, install and uninstall Flatpak apps.
 
+OPTIONS
+       --manpage          : Display this man page and exit.
+       --prewarm          : Ask the kernel to read the three most frequently launched apps and their
+                            runtimes into the page cache at startup (at most 64 MiB each), so they
+                            start faster. Ignored in multi-host mode.
+       --host HOST        : Manage the Flatpak apps of HOST over SSH. May be given several times;
+                            all hosts are queried in parallel and shown in one merged view, tagged
+                            by host. Each host uses one multiplexed SSH connection (ControlMaster).
+                            'tmp:NAME' runs commands locally in a temporary per-host environment,
+                            which is useful for testing.
+                            On remote hosts, apps are launched with 'systemd-run --user', so they
+                            only reach the display if the user is logged in to a graphical session
+                            whose environment is imported into the systemd user manager.
+
 KEY BINDINGS
        Up/Down Arrows     : Navigate the list.
        Left/Right Arrows  : Switch between Installed and Running apps.
        Enter              : Launch an app (or stop it if already running).
+       Space              : Mark/unmark a running app; Enter stops all marked apps.
        Ctrl+I             : Enter package installation mode.
        Ctrl+U             : Enter package uninstallation mode.
        Ctrl+H             : Display this help page.
+       F2                 : Select the hosts that operations fan out to (multi-host mode).
        ESC                : Exit the application.
 
 PACKAGE INSTALLATION MODE
@@ -48,11 +66,22 @@ def main_cli():
         description="Flatpak Manager - a curses based Flatpak management tool."
     )
     parser.add_argument('--manpage', action='store_true', help="Display the man page/help page and exit")
+    parser.add_argument('--prewarm', action='store_true',
+                        help="Pre-warm the page cache for the most frequently launched apps")
+    parser.add_argument('--host', action='append', default=[], metavar='HOST',
+                        help="Manage Flatpak apps on HOST over SSH (may be repeated)")
     args = parser.parse_args()
     if args.manpage:
         print(man_page_text)
         sys.exit(0)
-    curses.wrapper(main_loop)
+    if not args.host:
+        curses.wrapper(main_loop, None, args.prewarm)
+        return
+    pool = HostPool([transport_for(host) for host in dict.fromkeys(args.host)])
+    try:
+        curses.wrapper(main_loop, pool)
+    finally:
+        pool.close()
 
 if __name__ == "__main__":
     main_cli()
@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .commands import stop_flatpak
+from .instances import read_instance_processes, wait_for_instance_exit, kill_instance_namespace
+from .transport import LOCAL
+
+def stop_instance(instance_id: str, timeout: float = 5.0, transport=LOCAL, kill_grace: float = 0.5) -> bool:
+    """
+    Stop a single sandbox instance, escalating to SIGKILL of its PID namespace once
+    timeout seconds have passed since the stop began. Escalation needs the instance directory,
+    so on remote hosts only the result of 'flatpak kill' is reported.
+    A stuck local instance takes at most timeout + kill_grace seconds.
+
+    :param instance_id: The instance ID of the running application.
+    :param timeout: The time from the start of the stop until escalation, in seconds.
+    :param transport: The transport of the host running the instance.
+    :param kill_grace: The time to wait for the instance to exit after SIGKILL, in seconds.
+    :return: True if the instance is no longer running.
+    """
+    deadline = time.monotonic() + timeout
+    if transport is not LOCAL:
+        return stop_flatpak(instance_id, timeout=timeout, transport=transport)
+    # Identify the sandbox processes before stopping it, so a PID reused later is never mistaken for them.
+    processes = read_instance_processes(instance_id)
+    stop_flatpak(instance_id, timeout=timeout, transport=transport)
+    if wait_for_instance_exit(instance_id, max(0.0, deadline - time.monotonic()), processes=processes):
+        return True
+    kill_instance_namespace(instance_id, processes)
+    return wait_for_instance_exit(instance_id, kill_grace, processes=processes)
+
+def stop_instances(instance_ids, max_workers: int = 8, timeout: float = 5.0, transport=LOCAL) -> list:
+    """
+    Stop several sandbox instances concurrently with a bounded pool of workers.
+
+    :param instance_ids: The instance IDs to stop.
+    :param max_workers: The maximum number of instances stopped at the same time.
+    :param timeout: The per-instance time before escalating to SIGKILL, in seconds.
+        Every instance finishes within timeout plus the SIGKILL grace period.
+    :param transport: The transport of the host running the instances.
+    :return: The instance IDs that could not be stopped.
+    """
+    instance_ids = list(instance_ids)
+    if not instance_ids:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(instance_ids))) as pool:
+        results = pool.map(lambda instance_id: stop_instance(instance_id, timeout, transport), instance_ids)
+        return [instance_id for instance_id, stopped in zip(instance_ids, results) if not stopped]
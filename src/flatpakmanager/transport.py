@@ -0,0 +1,183 @@
+import os
+import shlex
+import shutil
+import tempfile
+import subprocess
+
+class HostUnreachableError(RuntimeError):
+    """
+    Raised when a command could not be delivered to its host.
+    """
+
+    def __init__(self, host: str, message: str):
+        super().__init__(message)
+        self.host = host
+
+# ssh exits with this status when it cannot connect; the remote command's own status is passed through otherwise.
+SSH_CONNECTION_FAILED = 255
+
+def check_connection(host: str, result: subprocess.CompletedProcess, check: bool) -> subprocess.CompletedProcess:
+    """
+    Turn an ssh connection failure into HostUnreachableError and apply check afterwards,
+    so callers can tell a failed command from a host that could not be reached.
+
+    :param host: The host the command was sent to.
+    :param result: The completed ssh process.
+    :param check: Raise CalledProcessError on any other non-zero exit status.
+    :return: The completed process.
+    """
+    if result.returncode == SSH_CONNECTION_FAILED:
+        raise HostUnreachableError(host, (result.stderr or "").strip() or f"cannot connect to {host}")
+    if check and result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+    return result
+
+class Transport:
+    """
+    Runs commands on the local machine. Subclasses run them somewhere else.
+    """
+
+    def __init__(self, name: str = "localhost"):
+        self.name = name
+        self.env = None
+
+    def command(self, argv: list) -> list:
+        """
+        Build the local argv that runs the given command on this transport's host.
+
+        :param argv: The command to run on the host.
+        :return: The argv to execute locally.
+        """
+        return list(argv)
+
+    def run(self, argv: list, check: bool = False, timeout: float = None) -> subprocess.CompletedProcess:
+        """
+        Run a command to completion and capture its output as text.
+
+        :param argv: The command to run on the host.
+        :param check: Raise CalledProcessError on a non-zero exit status.
+        :param timeout: The maximum run time in seconds (None waits indefinitely).
+        :return: The completed process.
+        """
+        return subprocess.run(
+            self.command(argv),
+            capture_output=True, text=True, check=check, timeout=timeout, env=self.env
+        )
+
+    def popen(self, argv: list) -> subprocess.Popen:
+        """
+        Start a command detached from the terminal and from our signals.
+
+        :param argv: The command to run on the host.
+        :return: The started process.
+        """
+        return subprocess.Popen(
+            self.command(argv),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            env=self.env
+        )
+
+    def close(self) -> None:
+        pass
+
+LOCAL = Transport()
+
+def default_control_dir() -> str:
+    """
+    Return the directory holding the SSH control sockets, creating it if needed.
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    path = os.path.join(base, f"flatpakmanager-ssh-{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+class SSHTransport(Transport):
+    """
+    Runs commands on a remote host over SSH. All commands to the same host share one
+    multiplexed master connection (ControlMaster), so only the first command pays for the handshake.
+    Keepalives make ssh give up on a host that stops answering after the connection was made.
+    """
+
+    def __init__(self, host: str, control_dir: str = None, persist: str = "10m", connect_timeout: int = 10,
+                 alive_interval: int = 5, alive_count: int = 2):
+        super().__init__(host)
+        self.control_path = os.path.join(control_dir or default_control_dir(), "%C")
+        self.options = [
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath={self.control_path}",
+            "-o", f"ControlPersist={persist}",
+            "-o", "BatchMode=yes",
+            "-o", f"ConnectTimeout={connect_timeout}",
+            "-o", f"ServerAliveInterval={alive_interval}",
+            "-o", f"ServerAliveCountMax={alive_count}",
+        ]
+
+    def command(self, argv: list) -> list:
+        return ["ssh", *self.options, self.name, "--", shlex.join(argv)]
+
+    def run(self, argv: list, check: bool = False, timeout: float = None) -> subprocess.CompletedProcess:
+        """
+        Run a command on the host. Raises HostUnreachableError if ssh cannot connect.
+        """
+        return check_connection(self.name, super().run(argv, timeout=timeout), check)
+
+    def close(self) -> None:
+        """
+        Shut down the master connection for this host.
+        """
+        subprocess.run(
+            ["ssh", *self.options, "-O", "exit", self.name],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+class TempEnvTransport(Transport):
+    """
+    Stand-in for SSHTransport that runs commands locally in a per-host temporary environment.
+    HOME, the XDG directories and FLATPAK_USER_DIR point into the host directory, and its bin/
+    directory comes first on PATH, so every host can get its own flatpak installation or stub.
+    Like SSHTransport it reports exit status 255 as HostUnreachableError, so a stub can
+    simulate a host that cannot be reached.
+    """
+
+    def __init__(self, name: str, root: str = None):
+        super().__init__(name)
+        self._owns_root = root is None
+        self.root = root or tempfile.mkdtemp(prefix=f"flatpakmanager-{name}-")
+        dirs = {}
+        for key in ("bin", "home", "data", "cache", "config", "runtime"):
+            dirs[key] = os.path.join(self.root, key)
+            os.makedirs(dirs[key], mode=0o700, exist_ok=True)
+        self.env = dict(
+            os.environ,
+            PATH=dirs["bin"] + os.pathsep + os.environ.get("PATH", os.defpath),
+            HOME=dirs["home"],
+            XDG_DATA_HOME=dirs["data"],
+            XDG_CACHE_HOME=dirs["cache"],
+            XDG_CONFIG_HOME=dirs["config"],
+            XDG_RUNTIME_DIR=dirs["runtime"],
+            FLATPAK_USER_DIR=os.path.join(dirs["data"], "flatpak"),
+            FLATPAK_MANAGER_HOST=name,
+        )
+
+    def run(self, argv: list, check: bool = False, timeout: float = None) -> subprocess.CompletedProcess:
+        return check_connection(self.name, super().run(argv, timeout=timeout), check)
+
+    def close(self) -> None:
+        if self._owns_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+def transport_for(spec: str) -> Transport:
+    """
+    Create a transport from a command line host specification.
+    'tmp:NAME' creates a TempEnvTransport, anything else is an SSH destination.
+
+    :param spec: The host specification.
+    :return: The transport for the host.
+    """
+    if spec.startswith("tmp:"):
+        return TempEnvTransport(spec[len("tmp:"):])
+    return SSHTransport(spec)
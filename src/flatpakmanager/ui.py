@@ -1,8 +1,12 @@
 import curses
 import time
 import signal
-from .commands import get_installed_flatpaks, get_running_flatpaks, run_flatpak, stop_flatpak, get_flatpak_description
-from .utils import confirm_action
+from .commands import get_installed_flatpaks, get_running_flatpaks, launch_flatpak_in_session
+from .appstate import AppState, FilteredView
+from .launcher import LaunchTracker, prewarm_frequent_apps
+from .stopper import stop_instances
+from .details import DetailFetcher, fetch_installed_details
+from .utils import confirm_action, show_host_report
 from .installer import install_package_mode
 from .uninstaller import uninstall_package_mode
 
@@ -32,9 +36,11 @@ def display_help_page(stdscr) -> None:
         "  Up/Down arrows    : Navigate the list.",
         "  Left/Right arrows : Switch between Installed and Running apps.",
         "  Enter             : Launch an app (or stop it if running).",
+        "  Space             : Mark/unmark a running app; Enter stops all marked apps.",
         "  Ctrl+I            : Enter package installation mode.",
         "  Ctrl+U            : Enter package uninstallation mode.",
         "  Ctrl+H            : Display this help page.",
+        "  F2                : Select the hosts that operations fan out to (multi-host mode).",
         "  ESC               : Exit the application.",
         "",
         "Installation Mode:",
@@ -59,103 +65,288 @@ def display_help_page(stdscr) -> None:
     stdscr.getch()
     stdscr.timeout(200)
 
-def main_loop(stdscr) -> None:
+def tagged(record, text: str) -> str:
+    """
+    Prefix text with the host of a record when several hosts are managed.
+    
+    :param record: The AppRecord the text belongs to.
+    :param text: The text to display.
+    :return: The text, tagged with the record's host if it has one.
+    """
+    return f"[{record.host}] {text}" if record.host else text
+
+def query_state(state, pool=None):
+    """
+    Refresh the AppState from the local machine or, in multi-host mode, from all hosts in parallel.
+    This waits for the hosts; the main loop refreshes hosts in the background instead.
+    
+    :param state: The AppState to update.
+    :param pool: The HostPool, or None for the local machine.
+    :return: The SnapshotDiff of the refresh.
+    """
+    if pool is None:
+        return state.update(get_installed_flatpaks(), get_running_flatpaks())
+    return state.update_hosts(pool.query())
+
+def stop_apps(state, keys, pool=None) -> list:
+    """
+    Stop the given apps concurrently, on every host they run on.
+    
+    :param state: The AppState holding the instance IDs of the apps.
+    :param keys: The AppState keys of the apps to stop.
+    :param pool: The HostPool, or None for the local machine.
+    :return: The labels of the apps that could not be stopped.
+    """
+    by_host = {}
+    for key in keys:
+        record = state.records.get(key)
+        if record is not None and record.running:
+            by_host.setdefault(record.host, {})[record.instance_id] = record
+    if pool is None:
+        instances = by_host.get(None, {})
+        failed = {None: stop_instances(instances)}
+    else:
+        failed = pool.fan_out(
+            lambda transport: stop_instances(by_host[transport.name], transport=transport), by_host
+        )
+        # A host that could not be reached failed to stop all of its instances.
+        for host in by_host:
+            if host not in failed:
+                failed[host] = list(by_host[host])
+    labels = []
+    for host, instances in failed.items():
+        suffix = " (unreachable)" if pool is not None and host in pool.errors else ""
+        labels.extend(tagged(by_host[host][instance], by_host[host][instance].app_id) + suffix
+                      for instance in instances)
+    return sorted(labels)
+
+def select_hosts(stdscr, pool) -> None:
+    """
+    Let the user choose the group of hosts that operations fan out to.
+    
+    :param stdscr: The curses window.
+    :param pool: The HostPool whose selection is edited.
+    """
+    stdscr.timeout(-1)
+    hosts = list(pool)
+    index = 0
+    while True:
+        stdscr.clear()
+        stdscr.addstr(0, 0, "Select hosts (Space to toggle, a to toggle all, Enter/ESC to return)")
+        for idx, host in enumerate(hosts):
+            mark = "[x]" if host in pool.selected else "[ ]"
+            line = f"{mark} {host}"
+            if host in pool.errors:
+                line += f"  (unreachable: {pool.errors[host]})"
+            try:
+                stdscr.addstr(2 + idx, 0, line, curses.A_REVERSE if idx == index else 0)
+            except curses.error:
+                pass
+        stdscr.refresh()
+        key = stdscr.getch()
+        if key == curses.KEY_UP and index > 0:
+            index -= 1
+        elif key == curses.KEY_DOWN and index < len(hosts) - 1:
+            index += 1
+        elif key == 32:
+            pool.selected.symmetric_difference_update({hosts[index]})
+        elif key == ord('a'):
+            pool.selected = set() if pool.selected == set(hosts) else set(hosts)
+        elif key in (10, 13, 27):
+            break
+    stdscr.timeout(200)
+
+def fan_out_launch_or_stop(stdscr, state, record, pool) -> list:
+    """
+    Launch an app, or stop it if it is running, on every selected host that has it installed.
+    If the record's host is not selected, only that host is targeted. Launches go through the
+    user's systemd session on each host and their outcome is reported per host.
+    
+    :param stdscr: The curses window.
+    :param state: The AppState.
+    :param record: The AppRecord the user chose.
+    :param pool: The HostPool.
+    :return: The labels of the apps that could not be stopped.
+    """
+    hosts = pool.selected if record.host in pool.selected else {record.host}
+    targets = [state.records[(host, record.app_id)] for host in sorted(hosts)
+               if (host, record.app_id) in state.records and state.records[(host, record.app_id)].installed]
+    if record.running:
+        running = [(target.host, target.app_id) for target in targets if target.running]
+        if confirm_action(stdscr, f"Do you really want to stop '{record.name}' on {len(running)} host(s)?"):
+            return stop_apps(state, running, pool)
+    else:
+        hosts = [target.host for target in targets if not target.running]
+        stdscr.clear()
+        stdscr.addstr(0, 0, f"Launching {record.name} on {', '.join(hosts)}...")
+        stdscr.refresh()
+        host_results = pool.fan_out(lambda transport: launch_flatpak_in_session(record.app_id, transport), hosts)
+        errors = {host: message for host, message in pool.errors.items() if host in hosts}
+        show_host_report(stdscr, f"Launch of {record.name} ({record.app_id}):", host_results, errors)
+    return []
+
+def main_loop(stdscr, pool=None, prewarm: bool = False) -> None:
     """
     Main event loop for the Flatpak Manager interface.
+    
+    :param stdscr: The curses window.
+    :param pool: A HostPool to manage several hosts, or None to manage the local machine.
+    :param prewarm: Pre-warm the page cache for the most frequently launched apps (local mode only).
     """
     global exit_requested
     signal.signal(signal.SIGINT, signal_handler)
     curses.curs_set(0)
     stdscr.timeout(200)  # Poll every 200 ms for input
 
-    selected_index = 0
-    selected_running_index = 0
     is_left_panel = True
     search_term = ""
     
     last_refresh_time = 0
     refresh_interval = 2  # seconds
-    installed_apps = []
-    running_apps = {}
+    state = AppState()
+    installed_view = FilteredView(lambda record: record.installed)
+    running_view = FilteredView(lambda record: record.running)
+    launches = LaunchTracker()
+    if pool is None:
+        details = DetailFetcher(fetch_installed_details)
+    else:
+        details = DetailFetcher(lambda key: fetch_installed_details(key[1], pool.transports[key[0]]))
+    marked_keys = set()
+    failed_to_stop = []
+    if prewarm and pool is None:
+        prewarm_frequent_apps()
 
     while True:
+        # Poll quickly while a launch is pending so the new instance shows up without waiting for the next refresh.
+        stdscr.timeout(50 if launches.pending else 200)
+        if launches.poll():
+            last_refresh_time = 0
         current_time = time.time()
+        diff = None
         if current_time - last_refresh_time > refresh_interval:
-            installed_apps = get_installed_flatpaks()
-            running_apps = get_running_flatpaks()
+            if pool is None:
+                diff = query_state(state)
+            else:
+                pool.refresh()
             last_refresh_time = current_time
+        # Hosts are queried in the background; merge whatever has arrived, keeping the last good snapshot of the rest.
+        if pool is not None and pool.collect():
+            diff = state.update_hosts(pool.snapshots)
+        if diff:
+            installed_view.apply(state, diff)
+            running_view.apply(state, diff)
+            for key in diff.removed:
+                details.invalidate(key)
+            for key in diff.removed | diff.changed:
+                if key not in running_view.keys:
+                    launches.latencies.pop(key, None)
+                    marked_keys.discard(key)
 
         stdscr.clear()
         stdscr.addstr(0, 0, "Flatpak Manager", curses.A_BOLD)
+        if pool is not None:
+            # Selected hosts are marked with '*', unreachable ones with '!'.
+            hosts = " ".join(host + ("*" if host in pool.selected else "") + ("!" if host in pool.errors else "")
+                             for host in pool)
+            stdscr.addstr(0, 40, ("Hosts: " + hosts)[:stdscr.getmaxyx()[1] - 41])
         stdscr.addstr(1, 0, "Search: " + search_term)
+        if launches.pending:
+            stdscr.addstr(1, 40, "Launching: " + ", ".join(launches.pending))
+        elif launches.failed:
+            stdscr.addstr(1, 40, "Failed to start: " + ", ".join(sorted(launches.failed)))
+        if failed_to_stop:
+            stdscr.addstr(2, 0, ("Failed to stop: " + ", ".join(failed_to_stop))[:39])
         
         # Display installed apps.
         stdscr.addstr(3, 0, "Installed Apps:", curses.A_UNDERLINE)
-        filtered_apps = [app for app in installed_apps if search_term.lower() in app[1].lower()]
-        
-        # Clamp selected_index to valid range.
-        if filtered_apps:
-            if selected_index >= len(filtered_apps):
-                selected_index = len(filtered_apps) - 1
-        else:
-            selected_index = 0
-        
-        for idx, (app_id, name) in enumerate(filtered_apps):
-            if idx == selected_index and is_left_panel:
+        for idx, key in enumerate(installed_view):
+            record = state.records[key]
+            name = tagged(record, record.name)
+            if key == installed_view.selected_key and is_left_panel:
                 stdscr.addstr(4 + idx, 0, name, curses.A_REVERSE)
             else:
                 stdscr.addstr(4 + idx, 0, name)
         
         # Display running apps.
         stdscr.addstr(3, 40, "Running Apps:", curses.A_UNDERLINE)
-        running_app_ids = list(running_apps.keys())
-        for idx, app_id in enumerate(running_app_ids):
-            if idx == selected_running_index and not is_left_panel:
-                stdscr.addstr(4 + idx, 40, app_id, curses.A_REVERSE)
+        for idx, key in enumerate(running_view):
+            record = state.records[key]
+            label = ("* " if key in marked_keys else "  ") + tagged(record, record.app_id)
+            if key in launches.latencies:
+                label += f" ({launches.latencies[key]:.2f}s)"
+            # Keep the label inside the panel; wide terminals draw the detail column at column 80.
+            label = label[:39]
+            if key == running_view.selected_key and not is_left_panel:
+                stdscr.addstr(4 + idx, 40, label, curses.A_REVERSE)
             else:
-                stdscr.addstr(4 + idx, 40, app_id)
+                stdscr.addstr(4 + idx, 40, label)
         
-        # Show description for the selected installed app.
-        if is_left_panel and filtered_apps:
-            app_id = filtered_apps[selected_index][0]
-            description = get_flatpak_description(app_id)
-            stdscr.addstr(2, 40, description[:80])
+        # Show details for the selected installed app; they are fetched in the background.
+        if is_left_panel and installed_view.selected:
+            max_y, max_x = stdscr.getmaxyx()
+            keys = installed_view.keys
+            index = installed_view.selected_index
+            details.prefetch(keys[i] for i in (index + 2, index - 1, index + 1) if 0 <= i < len(keys))
+            package_details = details.get(installed_view.selected)
+            if package_details is None:
+                stdscr.addstr(2, 40, "Loading details...")
+            else:
+                stdscr.addstr(2, 40, (package_details.description or "No description available.")[:max_x - 41])
+                # Wide terminals get a full detail column next to the Running panel.
+                if max_x >= 120:
+                    for j, line in enumerate(package_details.lines()):
+                        try:
+                            stdscr.addstr(3 + j, 80, line[:max_x - 81])
+                        except curses.error:
+                            pass
         
         stdscr.refresh()
         key = stdscr.getch()
+        previous_search_term = search_term
         if key != -1:
             if key == curses.KEY_UP:
-                if is_left_panel and selected_index > 0:
-                    selected_index -= 1
-                elif not is_left_panel and selected_running_index > 0:
-                    selected_running_index -= 1
+                (installed_view if is_left_panel else running_view).move(-1)
             elif key == curses.KEY_DOWN:
-                if is_left_panel and selected_index < len(filtered_apps) - 1:
-                    selected_index += 1
-                elif not is_left_panel and selected_running_index < len(running_app_ids) - 1:
-                    selected_running_index += 1
+                (installed_view if is_left_panel else running_view).move(1)
             elif key == curses.KEY_LEFT:
                 is_left_panel = True
             elif key == curses.KEY_RIGHT:
                 is_left_panel = False
             elif key in (10, 13):
-                if is_left_panel and filtered_apps:
-                    app_id, app_name = filtered_apps[selected_index]
-                    if app_id in running_apps:
-                        if confirm_action(stdscr, f"Do you really want to stop '{app_name}'?"):
-                            stop_flatpak(running_apps[app_id])
-                    else:
-                        run_flatpak(app_id)
-                elif not is_left_panel and running_app_ids:
-                    app_id = running_app_ids[selected_running_index]
-                    if confirm_action(stdscr, f"Do you really want to stop '{app_id}'?"):
-                        stop_flatpak(running_apps[app_id])
+                if is_left_panel and installed_view.selected and pool is not None:
+                    failed_to_stop = fan_out_launch_or_stop(stdscr, state, state.records[installed_view.selected], pool)
+                elif is_left_panel and installed_view.selected:
+                    record = state.records[installed_view.selected]
+                    if record.running:
+                        if confirm_action(stdscr, f"Do you really want to stop '{record.name}'?"):
+                            failed_to_stop = stop_apps(state, [installed_view.selected])
+                    elif record.app_id not in launches.pending:
+                        launches.launch(record.app_id)
+                elif not is_left_panel and marked_keys:
+                    if confirm_action(stdscr, f"Do you really want to stop {len(marked_keys)} marked apps?"):
+                        failed_to_stop = stop_apps(state, marked_keys, pool)
+                        marked_keys.clear()
+                elif not is_left_panel and running_view.selected:
+                    record = state.records[running_view.selected]
+                    if confirm_action(stdscr, f"Do you really want to stop '{tagged(record, record.app_id)}'?"):
+                        failed_to_stop = stop_apps(state, [running_view.selected], pool)
+                last_refresh_time = 0
+            elif key == 32 and not is_left_panel:  # Space toggles the mark in the Running panel.
+                if running_view.selected:
+                    marked_keys.symmetric_difference_update({running_view.selected})
+                    running_view.move(1)
             elif key == 27:  # ESC key pressed, request exit.
                 exit_requested = True
             elif key == 9:  # Ctrl+I for installation mode.
-                install_package_mode(stdscr)
+                install_package_mode(stdscr, pool)
+                details.clear()
+                last_refresh_time = 0
             elif key == 21:  # Ctrl+U for uninstallation mode.
-                uninstall_package_mode(stdscr)
+                uninstall_package_mode(stdscr, pool)
+                details.clear()
+                last_refresh_time = 0
+            elif key == curses.KEY_F2 and pool is not None:
+                select_hosts(stdscr, pool)
             elif key in (curses.KEY_BACKSPACE, 127):
                 if search_term:
                     search_term = search_term[:-1]
@@ -167,10 +358,18 @@ def main_loop(stdscr) -> None:
             elif 32 <= key <= 126:
                 search_term += chr(key)
         
+        # Only a changed search term requires refiltering the whole installed list.
+        if search_term != previous_search_term:
+            term = search_term.lower()
+            installed_view.set_predicate(lambda record: record.installed and term in record.name.lower(), state)
+        
         # Check for exit request.
         if exit_requested:
             stdscr.clear()
-            stdscr.addstr(0, 0, "Do you want to stop all running Flatpak apps before exit? (y/N/c)")
+            if pool is None:
+                stdscr.addstr(0, 0, "Do you want to stop all running Flatpak apps before exit? (y/N/c)")
+            else:
+                stdscr.addstr(0, 0, "Do you want to stop all running Flatpak apps on the selected hosts before exit? (y/N/c)")
             stdscr.refresh()
             while True:
                 response = stdscr.getch()
@@ -179,9 +378,25 @@ def main_loop(stdscr) -> None:
                         response = ord('n')
                     break
             if response == ord('y'):
-                running_apps = get_running_flatpaks()
-                for instance in running_apps.values():
-                    stop_flatpak(instance)
+                stdscr.clear()
+                stdscr.addstr(0, 0, "Stopping all running Flatpak apps...")
+                stdscr.refresh()
+                query_state(state, pool)
+                running_keys = [key for key, record in state.records.items()
+                                if record.running and (pool is None or record.host in pool.selected)]
+                failed = stop_apps(state, running_keys, pool)
+                if failed:
+                    stdscr.timeout(-1)
+                    stdscr.clear()
+                    stdscr.addstr(0, 0, "The following Flatpak apps could not be stopped:")
+                    for idx, label in enumerate(failed):
+                        try:
+                            stdscr.addstr(1 + idx, 0, f"  {label}")
+                        except curses.error:
+                            pass
+                    stdscr.addstr(min(2 + len(failed), stdscr.getmaxyx()[0] - 1), 0, "Press any key to exit.")
+                    stdscr.refresh()
+                    stdscr.getch()
                 break
             elif response == ord('n'):
                 break
@@ -189,6 +404,7 @@ def main_loop(stdscr) -> None:
                 exit_requested = False
                 continue
 
+    details.close()
     stdscr.clear()
     stdscr.refresh()
 
@@ -1,7 +1,7 @@
 import curses
 import pexpect
-from .utils import strip_ansi_codes, confirm_action
-from .commands import get_installed_flatpaks
+from .utils import strip_ansi_codes, confirm_action, show_host_report
+from .commands import get_installed_flatpaks, uninstall_flatpak
 
 def run_uninstall_command(stdscr, app_id: str, package_name: str) -> None:
     """
@@ -78,17 +78,27 @@ def run_uninstall_command(stdscr, app_id: str, package_name: str) -> None:
     while stdscr.getch() != ord('q'):
         pass
 
-def uninstall_package_mode(stdscr) -> None:
+def uninstall_package_mode(stdscr, pool=None) -> None:
     """
     Enter the interactive uninstallation mode.
     Allows users to search through installed packages and confirm removal.
+    In multi-host mode the packages installed on any selected host are listed,
+    and the package is removed from every selected host that has it.
     
     :param stdscr: The curses window.
+    :param pool: A HostPool to uninstall from, or None for the local machine.
     """
     curses.curs_set(1)
     search_term = ""
     selected_index = 0
     scroll_offset = 0
+    if pool is not None:
+        # Use the snapshots the main view already holds instead of waiting for the hosts again.
+        host_apps = {host: installed for host, (installed, _) in pool.snapshots.items() if host in pool.selected}
+        merged_apps = {}
+        for apps in host_apps.values():
+            merged_apps.update(apps)
+        merged_apps = sorted(merged_apps.items())
     
     while True:
         stdscr.clear()
@@ -99,7 +109,7 @@ def uninstall_package_mode(stdscr) -> None:
         max_y, max_x = stdscr.getmaxyx()
         available_rows = max_y - list_start_line
         
-        installed_apps = get_installed_flatpaks()
+        installed_apps = get_installed_flatpaks() if pool is None else merged_apps
         filtered_apps = [app for app in installed_apps if search_term.lower() in app[1].lower()] if search_term else installed_apps
 
         if selected_index < 0:
@@ -125,10 +135,22 @@ def uninstall_package_mode(stdscr) -> None:
         if key in (10, 13):  # Enter key
             if filtered_apps:
                 selected_app = filtered_apps[selected_index]
-                confirm_msg = f"Uninstall package {selected_app[1]} ({selected_app[0]})? Press Enter to confirm, any other key to cancel."
-                if confirm_action(stdscr, confirm_msg):
-                    run_uninstall_command(stdscr, selected_app[0], selected_app[1])
-                    break
+                if pool is not None:
+                    hosts = [host for host, apps in host_apps.items() if any(app_id == selected_app[0] for app_id, _ in apps)]
+                    confirm_msg = f"Uninstall package {selected_app[1]} ({selected_app[0]}) from {len(hosts)} host(s)?"
+                    if confirm_action(stdscr, confirm_msg):
+                        stdscr.clear()
+                        stdscr.addstr(0, 0, f"Uninstalling {selected_app[1]} ({selected_app[0]}) from {', '.join(hosts)}...")
+                        stdscr.refresh()
+                        results = pool.fan_out(lambda transport: uninstall_flatpak(selected_app[0], transport), hosts)
+                        errors = {host: message for host, message in pool.errors.items() if host in hosts}
+                        show_host_report(stdscr, f"Uninstallation of {selected_app[1]} ({selected_app[0]}):", results, errors)
+                        break
+                else:
+                    confirm_msg = f"Uninstall package {selected_app[1]} ({selected_app[0]})? Press Enter to confirm, any other key to cancel."
+                    if confirm_action(stdscr, confirm_msg):
+                        run_uninstall_command(stdscr, selected_app[0], selected_app[1])
+                        break
         elif key == 27:  # ESC cancels uninstallation mode.
             break
         elif key == curses.KEY_UP:
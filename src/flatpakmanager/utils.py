@@ -1,4 +1,5 @@
 import re
+import curses
 
 # Compile a regular expression for matching ANSI escape sequences.
 ANSI_ESCAPE = re.compile(r'\x1B\[[0-?]*[ -/]*[@-~]')
@@ -29,3 +30,27 @@ def confirm_action(stdscr, message: str) -> bool:
     result = key in (10, 13)  # Enter key codes.
     stdscr.timeout(200)
     return result
+
+def show_host_report(stdscr, title: str, results: dict, errors: dict) -> None:
+    """
+    Display the per-host outcome of an operation that fanned out to several hosts.
+    
+    :param stdscr: The curses window.
+    :param title: The title describing the operation.
+    :param results: A mapping from host name to True (succeeded) or False (failed).
+    :param errors: A mapping from host name to an error message for hosts that could not be reached.
+    """
+    stdscr.timeout(-1)
+    stdscr.clear()
+    stdscr.addstr(0, 0, title)
+    lines = [f"  {host}: {'ok' if ok else 'failed'}" for host, ok in sorted(results.items())]
+    lines += [f"  {host}: unreachable ({message})" for host, message in sorted(errors.items()) if host not in results]
+    lines += ["", "Press any key to return."]
+    for idx, line in enumerate(lines):
+        try:
+            stdscr.addstr(2 + idx, 0, line)
+        except curses.error:
+            pass
+    stdscr.refresh()
+    stdscr.getch()
+    stdscr.timeout(200)
@@ -0,0 +1,90 @@
+from flatpakmanager.appstate import AppRecord, AppState, FilteredView, diff_snapshots
+
+def running(record):
+    return record.running
+
+def test_diff_snapshots():
+    old = {
+        "org.a": AppRecord("org.a", "A"),
+        "org.b": AppRecord("org.b", "B"),
+        "org.c": AppRecord("org.c", "C"),
+    }
+    new = {
+        "org.a": AppRecord("org.a", "A"),
+        "org.b": AppRecord("org.b", "B", instance_id="1"),
+        "org.d": AppRecord("org.d", "D"),
+    }
+    diff = diff_snapshots(old, new)
+    assert diff.added == {"org.d"}
+    assert diff.removed == {"org.c"}
+    assert diff.changed == {"org.b"}
+    assert not diff_snapshots(new, dict(new))
+
+def test_update_reports_changes():
+    state = AppState()
+    diff = state.update([("org.a", "A"), ("org.b", "B")], {})
+    assert diff.added == {"org.a", "org.b"}
+    diff = state.update([("org.a", "A")], {"org.a": "1", "org.x": "2"})
+    assert diff.added == {"org.x"}
+    assert diff.removed == {"org.b"}
+    assert diff.changed == {"org.a"}
+    assert state.get("org.x").installed is False
+    assert state.get("org.a").instance_id == "1"
+
+def test_apply_matches_rebuild():
+    snapshots = [
+        ([("org.a", "A"), ("org.b", "B"), ("org.c", "C")], {"org.b": "1"}),
+        ([("org.a", "A"), ("org.c", "C"), ("org.d", "D")], {"org.a": "2", "org.c": "3", "org.e": "4"}),
+        ([("org.d", "D")], {"org.d": "5"}),
+        ([], {}),
+    ]
+    state = AppState()
+    installed = FilteredView(lambda record: record.installed)
+    running_view = FilteredView(running)
+    for installed_apps, running_apps in snapshots:
+        diff = state.update(installed_apps, running_apps)
+        installed.apply(state, diff)
+        running_view.apply(state, diff)
+        for view in (installed, running_view):
+            rebuilt = FilteredView(view.predicate)
+            rebuilt.rebuild(state)
+            assert view.keys == rebuilt.keys
+
+def test_selection_follows_its_app():
+    state = AppState()
+    view = FilteredView(lambda record: True)
+    view.apply(state, state.update([("org.c", "C"), ("org.e", "E")], {}))
+    view.move(1)
+    assert view.selected == "org.e"
+    view.apply(state, state.update([("org.a", "A"), ("org.b", "B"), ("org.c", "C"), ("org.e", "E")], {}))
+    assert view.selected == "org.e"
+    assert view.selected_index == 3
+    view.apply(state, state.update([("org.e", "E")], {}))
+    assert view.selected == "org.e"
+    assert view.selected_index == 0
+
+def test_selection_moves_to_neighbour_when_removed():
+    state = AppState()
+    view = FilteredView(lambda record: True)
+    view.apply(state, state.update([("org.a", "A"), ("org.b", "B"), ("org.c", "C")], {}))
+    view.move(1)
+    view.apply(state, state.update([("org.a", "A"), ("org.c", "C")], {}))
+    assert view.selected == "org.c"
+    view.apply(state, state.update([("org.a", "A")], {}))
+    assert view.selected == "org.a"
+    view.apply(state, state.update([], {}))
+    assert view.selected is None
+    # Moving in an empty view is a no-op.
+    view.move(1)
+    assert view.selected is None
+
+def test_view_follows_predicate_changes():
+    state = AppState()
+    view = FilteredView(running)
+    view.apply(state, state.update([("org.a", "A"), ("org.b", "B")], {"org.a": "1"}))
+    assert view.keys == ["org.a"]
+    view.apply(state, state.update([("org.a", "A"), ("org.b", "B")], {"org.b": "2"}))
+    assert view.keys == ["org.b"]
+    view.set_predicate(lambda record: record.name == "A", state)
+    assert view.keys == ["org.a"]
+    assert view.selected == "org.a"
@@ -0,0 +1,200 @@
+import time
+import threading
+from flatpakmanager.details import (
+    PackageDetails, DetailCache, DetailFetcher, parse_info_output, parse_permissions
+)
+
+FLATPAK_INFO = """
+GNU Image Manipulation Program - Create images and edit photographs
+
+          ID: org.gimp.GIMP
+         Ref: app/org.gimp.GIMP/x86_64/stable
+        Arch: x86_64
+      Branch: stable
+     Version: 2.10.38
+     License: GPL-3.0+
+      Origin: flathub
+  Collection: org.flathub.Stable
+Installation: system
+   Installed: 424.4 MB
+     Runtime: org.gnome.Platform/x86_64/46
+         Sdk: org.gnome.Sdk/x86_64/46
+
+      Commit: 4f1a9b0c
+     Subject: Update to 2.10.38
+        Date: 2024-05-03 10:00:00 +0000
+"""
+
+FLATPAK_REMOTE_INFO = """
+Firefox - Fast, Private & Safe Web Browser
+
+        ID: org.mozilla.firefox
+       Ref: app/org.mozilla.firefox/x86_64/stable
+      Arch: x86_64
+    Branch: stable
+   Version: 131.0
+   License: MPL-2.0
+Collection: org.flathub.Stable
+  Download: 105.3 MB
+ Installed: 262.5 MB
+   Runtime: org.freedesktop.Platform/x86_64/24.08
+       Sdk: org.freedesktop.Sdk/x86_64/24.08
+"""
+
+PERMISSIONS = """[Context]
+shared=network;ipc;
+sockets=x11;wayland;pulseaudio;
+devices=dri;
+filesystems=xdg-download;/tmp;
+
+[Session Bus Policy]
+org.freedesktop.Notifications=talk
+
+[System Bus Policy]
+org.freedesktop.NetworkManager=talk
+"""
+
+METADATA = """[Application]
+name=org.mozilla.firefox
+runtime=org.freedesktop.Platform/x86_64/24.08
+command=firefox
+
+[Context]
+shared=network;ipc;
+persistent=.mozilla;
+"""
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+def test_parse_info_output():
+    summary, fields = parse_info_output(FLATPAK_INFO)
+    assert summary == "Create images and edit photographs"
+    assert fields["Version"] == "2.10.38"
+    assert fields["Installed"] == "424.4 MB"
+    assert fields["Runtime"] == "org.gnome.Platform/x86_64/46"
+    assert fields["Origin"] == "flathub"
+    assert fields["Date"] == "2024-05-03 10:00:00 +0000"
+
+def test_parse_remote_info_output():
+    summary, fields = parse_info_output(FLATPAK_REMOTE_INFO)
+    assert summary == "Fast, Private & Safe Web Browser"
+    assert fields["Download"] == "105.3 MB"
+    assert fields["Installed"] == "262.5 MB"
+
+def test_parse_permissions():
+    assert parse_permissions(PERMISSIONS) == [
+        "shared: network, ipc",
+        "sockets: x11, wayland, pulseaudio",
+        "devices: dri",
+        "filesystems: xdg-download, /tmp",
+        "session bus: org.freedesktop.Notifications (talk)",
+        "system bus: org.freedesktop.NetworkManager (talk)",
+    ]
+
+def test_parse_permissions_from_metadata():
+    assert parse_permissions(METADATA) == ["shared: network, ipc", "persistent: .mozilla"]
+
+def test_parse_permissions_ignores_garbage():
+    assert parse_permissions("") == []
+    assert parse_permissions("not a keyfile") == []
+
+def test_cache_evicts_least_recently_used_by_size():
+    details = {key: PackageDetails(key, description="x" * 99) for key in "abc"}
+    size = details["a"].size
+    cache = DetailCache(max_bytes=2 * size)
+    cache.put("a", details["a"])
+    cache.put("b", details["b"])
+    assert cache.get("a") is details["a"]
+    cache.put("c", details["c"])
+    assert "b" not in cache
+    assert cache.get("a") is details["a"] and cache.get("c") is details["c"]
+    assert cache.total_bytes == 2 * size
+
+def test_cache_accounts_replaced_and_discarded_entries():
+    cache = DetailCache()
+    cache.put("a", PackageDetails("a", description="short"))
+    replacement = PackageDetails("a", description="a longer description")
+    cache.put("a", replacement)
+    assert len(cache) == 1
+    assert cache.total_bytes == replacement.size
+    cache.discard("a")
+    cache.discard("missing")
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+def test_cache_keeps_a_single_oversized_entry():
+    cache = DetailCache(max_bytes=10)
+    cache.put("a", PackageDetails("a", description="x" * 100))
+    assert "a" in cache
+
+def test_fetcher_caps_requests_in_flight():
+    release = threading.Event()
+    started = []
+
+    def fetch(key):
+        started.append(key)
+        release.wait()
+        return PackageDetails(key)
+
+    fetcher = DetailFetcher(fetch, max_in_flight=2)
+    try:
+        fetcher.prefetch(["a", "b", "c", "d"])
+        wait_until(lambda: len(started) == 2)
+        time.sleep(0.05)
+        assert len(started) == 2
+        release.set()
+        wait_until(lambda: len(fetcher.cache) == 4)
+    finally:
+        release.set()
+        fetcher.close()
+
+def test_fetcher_serves_newest_requests_first_and_drops_old_ones():
+    release = threading.Event()
+    started = []
+
+    def fetch(key):
+        started.append(key)
+        release.wait()
+        return PackageDetails(key)
+
+    fetcher = DetailFetcher(fetch, max_in_flight=1, max_queued=2)
+    try:
+        assert fetcher.get("a") is None
+        wait_until(lambda: started == ["a"])
+        for key in "bcd":
+            fetcher.get(key)
+        release.set()
+        wait_until(lambda: "c" in fetcher.cache)
+        assert started == ["a", "d", "c"]
+        assert "b" not in fetcher.cache
+        assert fetcher.get("d").app_id == "d"
+    finally:
+        release.set()
+        fetcher.close()
+
+def test_fetcher_retries_errors_after_ttl():
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        if len(calls) == 1:
+            raise RuntimeError("remote unreachable")
+        return PackageDetails(key, version="1.0")
+
+    fetcher = DetailFetcher(fetch, error_ttl=0.2)
+    try:
+        fetcher.get("a")
+        wait_until(lambda: fetcher.get("a") is not None)
+        assert fetcher.get("a").error == "remote unreachable"
+        assert "a" not in fetcher.cache
+        assert calls == ["a"]
+        time.sleep(0.25)
+        assert fetcher.get("a") is None
+        wait_until(lambda: "a" in fetcher.cache)
+        assert fetcher.get("a").version == "1.0"
+        assert calls == ["a", "a"]
+    finally:
+        fetcher.close()
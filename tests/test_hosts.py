@@ -0,0 +1,182 @@
+import os
+import time
+import shutil
+import pytest
+from flatpakmanager.appstate import AppState
+from flatpakmanager.hosts import HostPool
+from flatpakmanager.transport import TempEnvTransport, SSHTransport
+from flatpakmanager.ui import stop_apps
+from flatpakmanager.commands import launch_flatpak_in_session
+from flatpakmanager.installer import search_transport_for, search_packages
+
+# A stub flatpak that answers like the real one, with per-host output.
+FLATPAK_STUB = """#!/bin/sh
+case "$1" in
+  list) printf 'org.example.Editor\\tEditor\\norg.example.Viewer\\tViewer on %s\\n' "$FLATPAK_MANAGER_HOST";;
+  ps) printf 'inst-%s\\torg.example.Editor\\n' "$FLATPAK_MANAGER_HOST";;
+  search) printf 'org.example.Editor\\tEditor\\tEdits text\\n';;
+  kill) exit {kill_status};;
+esac
+"""
+
+@pytest.fixture
+def make_host():
+    transports = []
+
+    def make(name, script=None, kill_status=0):
+        transport = TempEnvTransport(name)
+        bin_dir = os.path.join(transport.root, "bin")
+        # Keep the system flatpak, if any, out of the stand-in hosts.
+        transport.env["PATH"] = bin_dir + os.pathsep + os.path.dirname(shutil.which("sh"))
+        if script is None:
+            script = FLATPAK_STUB.format(kill_status=kill_status)
+        if script:
+            path = os.path.join(bin_dir, "flatpak")
+            with open(path, "w") as f:
+                f.write(script)
+            os.chmod(path, 0o755)
+        transports.append(transport)
+        return transport
+
+    yield make
+    for transport in transports:
+        transport.close()
+
+def test_query_merges_all_hosts(make_host):
+    pool = HostPool([make_host("alpha"), make_host("beta")])
+    try:
+        snapshots = pool.query()
+    finally:
+        pool.close()
+    assert sorted(snapshots) == ["alpha", "beta"]
+    installed, running = snapshots["beta"]
+    assert installed == [("org.example.Editor", "Editor"), ("org.example.Viewer", "Viewer on beta")]
+    assert running == {"org.example.Editor": "inst-beta"}
+    assert pool.errors == {}
+
+def test_update_hosts_keys_records_by_host(make_host):
+    pool = HostPool([make_host("alpha"), make_host("beta")])
+    try:
+        state = AppState()
+        diff = state.update_hosts(pool.query())
+    finally:
+        pool.close()
+    assert diff.added == {
+        ("alpha", "org.example.Editor"), ("alpha", "org.example.Viewer"),
+        ("beta", "org.example.Editor"), ("beta", "org.example.Viewer"),
+    }
+    record = state.records[("beta", "org.example.Editor")]
+    assert record.host == "beta"
+    assert record.instance_id == "inst-beta"
+    assert not state.records[("beta", "org.example.Viewer")].running
+
+def test_stop_apps_reports_partial_failure(make_host):
+    pool = HostPool([make_host("alpha"), make_host("beta", kill_status=1)])
+    try:
+        state = AppState()
+        state.update_hosts(pool.query())
+        running = [key for key, record in state.records.items() if record.running]
+        failed = stop_apps(state, running, pool)
+    finally:
+        pool.close()
+    assert failed == ["[beta] org.example.Editor"]
+
+def test_unreachable_host_is_reported(make_host):
+    # ssh exits with 255 when it cannot connect.
+    pool = HostPool([make_host("alpha"), make_host("down", script="#!/bin/sh\nexit 255\n")])
+    try:
+        snapshots = pool.query()
+    finally:
+        pool.close()
+    assert sorted(snapshots) == ["alpha"]
+    assert list(pool.errors) == ["down"]
+
+def test_host_without_flatpak_is_reachable(make_host):
+    pool = HostPool([make_host("bare", script="")])
+    try:
+        snapshots = pool.query()
+    finally:
+        pool.close()
+    assert snapshots == {"bare": ([], {})}
+    assert pool.errors == {}
+
+def test_stop_on_unreachable_host_is_labelled(make_host):
+    alpha = make_host("alpha")
+    pool = HostPool([alpha])
+    try:
+        state = AppState()
+        state.update_hosts(pool.query())
+        with open(os.path.join(alpha.root, "bin", "flatpak"), "w") as f:
+            f.write("#!/bin/sh\nexit 255\n")
+        failed = stop_apps(state, [("alpha", "org.example.Editor")], pool)
+    finally:
+        pool.close()
+    assert failed == ["[alpha] org.example.Editor (unreachable)"]
+
+def test_slow_host_does_not_hold_up_others(make_host):
+    slow = make_host("slow")
+    pool = HostPool([make_host("fast"), slow], query_timeout=0.5)
+    try:
+        pool.query()
+        with open(os.path.join(slow.root, "bin", "flatpak"), "w") as f:
+            f.write("#!/bin/sh\nsleep 5\n")
+        pool.refresh()
+        deadline = time.monotonic() + 0.4
+        while "fast" in pool._queries and time.monotonic() < deadline:
+            pool.collect()
+            time.sleep(0.01)
+        assert "fast" not in pool._queries
+        assert "slow" in pool._queries
+        # The slow host keeps its last good snapshot until its query times out.
+        assert pool.snapshots["slow"][1] == {"org.example.Editor": "inst-slow"}
+        pool.query()
+        assert "slow" in pool.errors
+        assert pool.snapshots["slow"][1] == {"org.example.Editor": "inst-slow"}
+    finally:
+        pool.close()
+
+def test_search_skips_unreachable_host(make_host):
+    down = make_host("a-down", script="#!/bin/sh\nexit 255\n")
+    pool = HostPool([down, make_host("beta")])
+    try:
+        pool.query()
+        packages, message = search_packages("editor", search_transport_for(pool))
+    finally:
+        pool.close()
+    assert packages == [("org.example.Editor", "Editor", "Edits text")]
+    assert message == ""
+
+def test_search_on_unreachable_host_reports_error(make_host):
+    packages, message = search_packages("editor", make_host("down", script="#!/bin/sh\nexit 255\n"))
+    assert packages == []
+    assert message == "Search failed: down is unreachable."
+
+def test_search_on_slow_host_times_out(make_host):
+    packages, message = search_packages("editor", make_host("slow", script="#!/bin/sh\nsleep 5\n"), timeout=0.5)
+    assert packages == []
+    assert "did not answer" in message
+
+def test_launch_timeout_is_a_failure_not_an_unreachable_host(make_host):
+    alpha = make_host("alpha")
+    path = os.path.join(alpha.root, "bin", "systemd-run")
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\nsleep 5\n")
+    os.chmod(path, 0o755)
+    pool = HostPool([alpha])
+    try:
+        results = pool.fan_out(lambda transport: launch_flatpak_in_session(
+            "org.example.Editor", transport, settle=0, timeout=0.5))
+    finally:
+        pool.close()
+    assert results == {"alpha": False}
+    assert pool.errors == {}
+
+@pytest.mark.skipif(shutil.which("ssh") is None, reason="ssh is not installed")
+def test_ssh_connection_failure_is_reported(tmp_path):
+    pool = HostPool([SSHTransport("nonexistent.invalid", control_dir=str(tmp_path), connect_timeout=2)])
+    try:
+        snapshots = pool.query()
+    finally:
+        pool.close()
+    assert snapshots == {}
+    assert list(pool.errors) == ["nonexistent.invalid"]
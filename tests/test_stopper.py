@@ -0,0 +1,68 @@
+import json
+import signal
+import subprocess
+import pytest
+from flatpakmanager import instances, stopper
+from flatpakmanager.instances import read_instance_processes, instance_alive, kill_instance_namespace
+from flatpakmanager.stopper import stop_instance
+
+@pytest.fixture
+def instance_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(instances, "INSTANCE_DIR", str(tmp_path))
+    return tmp_path
+
+@pytest.fixture
+def sandbox(instance_dir):
+    """
+    A stand-in sandbox: a process that ignores SIGTERM, registered as instance '1'
+    the way Flatpak registers bwrap and the namespace init.
+    """
+    process = subprocess.Popen(["sh", "-c", "trap '' TERM; while :; do sleep 0.05; done"])
+    path = instance_dir / "1"
+    path.mkdir()
+    (path / "info").write_text("[Application]\nname=org.example.Editor\n")
+    (path / "pid").write_text(str(process.pid))
+    (path / "bwrapinfo.json").write_text(json.dumps({"child-pid": process.pid}))
+    yield process
+    process.kill()
+    process.wait()
+
+def test_stop_instance_escalates_to_sigkill(sandbox, monkeypatch):
+    # 'flatpak kill' is not available here; the sandbox has to be killed by escalation.
+    monkeypatch.setattr(stopper, "stop_flatpak", lambda *args, **kwargs: False)
+    assert stop_instance("1", timeout=0.2)
+    assert sandbox.wait(timeout=1) == -signal.SIGKILL
+
+def test_stop_instance_of_exited_sandbox(sandbox, monkeypatch):
+    monkeypatch.setattr(stopper, "stop_flatpak", lambda *args, **kwargs: False)
+    sandbox.kill()
+    sandbox.wait()
+    assert stop_instance("1", timeout=0.2)
+
+def test_reused_pid_is_not_the_sandbox(sandbox):
+    processes = read_instance_processes("1")
+    assert processes and instance_alive("1", processes)
+    # A process with the recorded PID but another start time has reused the PID.
+    reused = {pid: start_time + 1 for pid, start_time in processes.items()}
+    assert not instance_alive("1", reused)
+    assert not kill_instance_namespace("1", reused)
+    assert sandbox.poll() is None
+
+def test_stale_instance_directory_is_not_alive(instance_dir):
+    path = instance_dir / "2"
+    path.mkdir()
+    (path / "pid").write_text(str(2 ** 22 + 1))
+    assert read_instance_processes("2") == {}
+    assert not instance_alive("2")
+    assert not kill_instance_namespace("2")
+
+def test_remote_stop_reports_flatpak_kill(monkeypatch):
+    calls = []
+
+    def fake_stop(instance_id, timeout=None, transport=None):
+        calls.append(instance_id)
+        return True
+
+    monkeypatch.setattr(stopper, "stop_flatpak", fake_stop)
+    assert stop_instance("1", transport=object())
+    assert calls == ["1"]